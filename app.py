@@ -0,0 +1,469 @@
+import hashlib
+import hmac
+import os
+import time
+import uuid
+from decimal import Decimal
+from functools import lru_cache
+from cachetools import TTLCache
+from flask import Flask, Response, request, stream_with_context
+from flask_compress import Compress
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import UUID
+import bcrypt
+import msgspec
+import orjson
+from datetime import datetime, timedelta
+from sqlalchemy import Float, cast, select, text
+
+# Create the core Flask application object.
+app = Flask(__name__)
+
+# Database credentials come from AWS Secrets Manager when
+# WEATHER_DB_SECRET_NAME is set (the deployed configuration) and fall back to
+# environment variables / local development defaults otherwise. The fetch is
+# cached per process with a one-hour TTL, so each gunicorn fork or Lambda
+# cold start pays the Secrets Manager round-trip at most once an hour rather
+# than on every use.
+_CREDENTIALS_TTL = 3600
+_credentials_fetched_at = 0.0
+
+
+@lru_cache(maxsize=1)
+def _fetch_db_credentials():
+    secret_name = os.environ.get("WEATHER_DB_SECRET_NAME")
+    if secret_name:
+        # boto3 is only needed in the deployed configuration, where the
+        # Lambda runtime already provides it.
+        import boto3
+        secret = boto3.client("secretsmanager").get_secret_value(SecretId=secret_name)
+        return orjson.loads(secret["SecretString"])
+    return {
+        "username": os.environ.get("DB_USERNAME", "postgres"),
+        "password": os.environ.get("DB_PASSWORD", "password"),
+        "host": os.environ.get("DB_HOST", "localhost"),
+        "port": os.environ.get("DB_PORT", "5432"),
+        "dbname": os.environ.get("DB_NAME", "weather_db"),
+    }
+
+
+def get_db_credentials():
+    global _credentials_fetched_at
+    now = time.monotonic()
+    if now - _credentials_fetched_at > _CREDENTIALS_TTL:
+        _fetch_db_credentials.cache_clear()
+        _credentials_fetched_at = now
+    return _fetch_db_credentials()
+
+
+# The pool calls this for every new connection, which is the first moment
+# the credentials are actually needed. Deferring the fetch here keeps module
+# import (and so Lambda cold start) free of any Secrets Manager round-trip;
+# the healthcheck route can answer before the database is ever touched.
+def _connect():
+    import psycopg
+    creds = get_db_credentials()
+    return psycopg.connect(
+        user=creds["username"],
+        password=creds["password"],
+        host=creds["host"],
+        port=creds["port"],
+        dbname=creds["dbname"],
+        # Promote repeated statements to server-side prepared statements
+        # after their first execution (skips parse/plan on repeats).
+        prepare_threshold=1,
+    )
+
+
+# Credential-free URL: it only selects the dialect/driver, the creator above
+# makes the actual connections.
+app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql+psycopg://"
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Default pool size is 5, which serializes workers under concurrency.
+# pre_ping/recycle keep pooled connections from going stale between bursts.
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": 20,
+    "max_overflow": 40,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "creator": _connect,
+    # Size SQLAlchemy's compiled-SQL cache well past the default 500 so all
+    # endpoint statements stay cached.
+    "query_cache_size": 1200,
+}
+
+# Readings JSON is highly repetitive (the same keys on every row), so large
+# responses compress roughly 10x. Compression only kicks in past 1 KiB --
+# the small status/summary payloads are not worth the CPU.
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 1024
+Compress(app)
+
+db = SQLAlchemy(app)
+
+# Dashboards poll /summary every few seconds but the aggregate only changes
+# when a reading lands, so cache the response dict per station for up to a
+# minute. Inserts invalidate the entry, so the TTL is just a backstop. Keys
+# are the uuid.UUID objects that both the route converter and the request
+# decoder produce.
+_summary_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+# API keys are 192-bit random tokens, so a slow KDF like bcrypt adds nothing
+# over a fast hash -- the keyspace, not the hash, is the attacker's problem.
+# Keys are stored as sha256(salt + key) with a random per-station salt and
+# verified with a constant-time comparison.
+def _hash_api_key(api_key, salt):
+    return hashlib.sha256(salt + api_key.encode("utf-8")).hexdigest()
+
+
+# Returns None when the station does not exist, otherwise whether the key
+# matches. Fetches only the credential columns instead of the whole Station
+# row.
+def _verify_api_key(station_id, api_key):
+    row = db.session.execute(
+        select(Station.api_key_hash, Station.api_key_salt).where(Station.station_id == station_id)
+    ).first()
+    if row is None:
+        return None
+
+    stored_hash, salt = row
+    if salt is not None:
+        return hmac.compare_digest(_hash_api_key(api_key, salt), stored_hash)
+
+    # Legacy row still carrying a bcrypt hash: verify the slow way once, then
+    # rehash to salted SHA-256 so the cost is never paid again.
+    valid = bcrypt.checkpw(api_key.encode("utf-8"), stored_hash.encode("utf-8"))
+    if valid:
+        salt = os.urandom(16)
+        db.session.execute(
+            db.update(Station)
+            .where(Station.station_id == station_id)
+            .values(api_key_hash=_hash_api_key(api_key, salt), api_key_salt=salt)
+        )
+    return valid
+
+
+def _json_default(obj):
+    # orjson handles datetime and UUID natively; Decimal (from the Numeric
+    # column) is the only type we need to convert ourselves.
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+# Request schemas. msgspec parses and validates the raw body in one pass of
+# native code -- no intermediate dict, and malformed or incomplete payloads
+# are rejected by the decoder itself instead of by chains of .get() checks.
+class StationIn(msgspec.Struct):
+    name: str
+    location_text: str | None = None
+
+
+class ReadingIn(msgspec.Struct):
+    station_id: uuid.UUID
+    temperature_celsius: float
+
+
+class BulkReadingIn(msgspec.Struct):
+    temperature_celsius: float
+
+
+class BulkReadingsIn(msgspec.Struct):
+    station_id: uuid.UUID
+    readings: list[BulkReadingIn]
+
+
+_station_decoder = msgspec.json.Decoder(StationIn)
+_reading_decoder = msgspec.json.Decoder(ReadingIn)
+_bulk_decoder = msgspec.json.Decoder(BulkReadingsIn)
+
+
+# Serialize responses with orjson instead of flask.jsonify. orjson encodes in
+# native code and is several times faster than the stdlib json module, which
+# matters most for the readings list endpoint.
+def _json(data, status=200):
+    return Response(
+        orjson.dumps(data, option=orjson.OPT_NAIVE_UTC, default=_json_default),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+class Station(db.Model):
+    __tablename__ = "stations"
+    station_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = db.Column(db.String(255), nullable=False)
+    location_text = db.Column(db.String(255))
+    api_key_hash = db.Column(db.String(255), nullable=False)
+    # NULL for rows created before the move to salted SHA-256, whose
+    # api_key_hash still holds a bcrypt hash.
+    api_key_salt = db.Column(db.LargeBinary(16))
+    # Maintained by the submit endpoints; NULL means the station has never
+    # reported, which lets reads skip the readings table entirely.
+    last_reading_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    readings = db.relationship("Reading", backref="station", lazy=True)
+
+
+class Reading(db.Model):
+    __tablename__ = "readings"
+    reading_id = db.Column(db.Integer, primary_key=True)
+    station_id = db.Column(UUID(as_uuid=True), db.ForeignKey("stations.station_id"), nullable=False)
+    temperature_celsius = db.Column(db.Numeric(5, 2), nullable=False)
+    timestamp = db.Column(db.DateTime, server_default=db.func.now())
+    # Both read endpoints filter on station_id and order/range on timestamp;
+    # this index turns them into index-range scans with no sort step, and the
+    # INCLUDEd temperature lets the summary aggregate run index-only.
+    __table_args__ = (
+        db.Index(
+            "ix_readings_station_ts",
+            "station_id",
+            db.text("timestamp DESC"),
+            postgresql_include=["temperature_celsius"]
+        ),
+    )
+
+
+@app.route("/")
+def index():
+    # Simple health-check endpoint.
+    return _json({"message": "Weather Station API is running!"})
+
+
+@app.route("/stations", methods=["POST"])
+def create_station():
+    try:
+        data = _station_decoder.decode(request.get_data())
+    except msgspec.DecodeError:
+        return _json({"error": "Station name is required"}, 400)
+    if not data.name:
+        return _json({"error": "Station name is required"}, 400)
+
+    # Generate a secure random API key for the new station.
+    api_key_plain = os.urandom(24).hex()
+
+    # Only the salted hash of the key is stored, never the plaintext.
+    api_key_salt = os.urandom(16)
+
+    new_station = Station(
+        name=data.name,
+        location_text=data.location_text,
+        api_key_hash=_hash_api_key(api_key_plain, api_key_salt),
+        api_key_salt=api_key_salt
+    )
+
+    # begin() commits on success and rolls back on error; the connection goes
+    # back to the pool at request teardown (Flask-SQLAlchemy's session.remove)
+    # rather than being torn down per request.
+    try:
+        with db.session.begin():
+            db.session.add(new_station)
+    except Exception as e:
+        return _json({"error": "Could not create station", "details": str(e)}, 500)
+
+    # The plaintext key is returned exactly once, at creation time.
+    return _json({
+        "message": "Station created successfully. Save your API key!",
+        "station_id": new_station.station_id,
+        "api_key": api_key_plain
+    }, 201)
+
+
+@app.route("/readings", methods=["POST"])
+def submit_reading():
+    # Stations authenticate with the API key issued at creation time.
+    api_key = request.headers.get("x-api-key")
+    if not api_key:
+        return _json({"error": "API key is missing"}, 401)
+
+    try:
+        data = _reading_decoder.decode(request.get_data())
+    except msgspec.DecodeError:
+        return _json({"error": "station_id and temperature_celsius are required"}, 400)
+
+    valid = _verify_api_key(data.station_id, api_key)
+    if valid is None:
+        return _json({"error": "Station not found"}, 404)
+    if not valid:
+        return _json({"error": "Invalid API key"}, 401)
+
+    try:
+        # Plain Core insert: no Reading instance, no unit-of-work tracking.
+        db.session.execute(
+            db.insert(Reading).values(
+                station_id=data.station_id,
+                temperature_celsius=data.temperature_celsius
+            )
+        )
+        db.session.execute(
+            db.update(Station)
+            .where(Station.station_id == data.station_id)
+            .values(last_reading_at=db.func.now())
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return _json({"error": "Could not save reading", "details": str(e)}, 500)
+
+    _summary_cache.pop(data.station_id, None)
+    return _json({"message": "Reading submitted successfully"}, 201)
+
+
+@app.route("/readings/bulk", methods=["POST"])
+def submit_readings_bulk():
+    # Same authentication as /readings, but the key is verified once for the
+    # whole batch and all rows go in as a single multi-row INSERT, so the
+    # per-request costs are amortized across the batch.
+    api_key = request.headers.get("x-api-key")
+    if not api_key:
+        return _json({"error": "API key is missing"}, 401)
+
+    try:
+        data = _bulk_decoder.decode(request.get_data())
+    except msgspec.DecodeError:
+        return _json({"error": "station_id and a non-empty readings list are required"}, 400)
+    if not data.readings:
+        return _json({"error": "station_id and a non-empty readings list are required"}, 400)
+
+    valid = _verify_api_key(data.station_id, api_key)
+    if valid is None:
+        return _json({"error": "Station not found"}, 404)
+    if not valid:
+        return _json({"error": "Invalid API key"}, 401)
+
+    rows = [
+        {"station_id": data.station_id, "temperature_celsius": r.temperature_celsius}
+        for r in data.readings
+    ]
+
+    try:
+        # executemany form: psycopg turns this into one multi-row VALUES
+        # statement, so the batch shares a single round-trip and commit fsync.
+        db.session.execute(db.insert(Reading), rows)
+        db.session.execute(
+            db.update(Station)
+            .where(Station.station_id == data.station_id)
+            .values(last_reading_at=db.func.now())
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return _json({"error": "Could not save readings", "details": str(e)}, 500)
+
+    _summary_cache.pop(data.station_id, None)
+    return _json({"message": "Readings submitted successfully", "count": len(rows)}, 201)
+
+
+@app.route("/stations/<uuid:station_id>/readings", methods=["GET"])
+def get_readings(station_id):
+    # Selecting just the three columns returns plain row tuples instead of
+    # full ORM instances, skipping identity-map and instrumentation overhead
+    # on every row.
+    # no_autoflush: this endpoint is read-only, so the pre-execute dirty scan
+    # is pure overhead.
+    with db.session.no_autoflush:
+        # One cheap primary-key lookup answers both "does the station exist"
+        # (404) and "has it ever reported" -- a station with no readings
+        # short-circuits before the sorted readings scan is even issued.
+        station_row = db.session.execute(
+            select(Station.last_reading_at).where(Station.station_id == station_id)
+        ).first()
+        if station_row is None:
+            return _json({"error": "Station not found"}, 404)
+        if station_row[0] is None:
+            return _json([])
+
+    # The cast to double precision happens in Postgres, so rows arrive with a
+    # native float instead of a Decimal that Python would have to allocate
+    # and convert per row.
+    stmt = (
+        select(Reading.reading_id, cast(Reading.temperature_celsius, Float), Reading.timestamp)
+        .where(Reading.station_id == station_id)
+        .order_by(Reading.timestamp.desc())
+    )
+
+    # Stream the readings instead of materializing the whole list in memory:
+    # yield_per fetches in 1000-row batches, and each batch is serialized
+    # while the next is fetched, so peak memory stays bounded no matter how
+    # much history a station has. The request's session cannot be used here
+    # because it is removed (rollback + connection check-in) before the
+    # server iterates the response, which would destroy the server-side
+    # cursor mid-stream; the generator owns its own connection instead, so
+    # the cursor's transaction lives exactly as long as the stream.
+    def generate():
+        with db.engine.connect() as conn:
+            rows = conn.execution_options(yield_per=1000).execute(stmt)
+            yield b"["
+            first = True
+            for reading_id, temperature_celsius, timestamp in rows:
+                if not first:
+                    yield b","
+                first = False
+                yield orjson.dumps({
+                    "reading_id": reading_id,
+                    "temperature_celsius": temperature_celsius,
+                    "timestamp": timestamp
+                }, option=orjson.OPT_NAIVE_UTC, default=_json_default)
+            yield b"]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+@app.route("/stations/<uuid:station_id>/summary", methods=["GET"])
+def get_summary(station_id):
+    cached = _summary_cache.get(station_id)
+    if cached is not None:
+        return _json(cached)
+
+    # Summaries only cover the most recent 24 hours of readings.
+    twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
+
+    # One round-trip: the CTE is scanned once for the aggregates and the ten
+    # most recent readings are bundled into the same result row, so dashboard
+    # clients no longer need a second call to /readings. no_autoflush skips
+    # the pre-execute dirty scan on this read-only path.
+    with db.session.no_autoflush:
+        summary_data = db.session.execute(text("""
+            WITH recent AS (
+                SELECT reading_id, temperature_celsius, timestamp
+                FROM readings
+                WHERE station_id = :station_id AND timestamp >= :since
+            )
+            SELECT count(*),
+                   avg(temperature_celsius)::double precision,
+                   max(temperature_celsius)::double precision,
+                   min(temperature_celsius)::double precision,
+                   (SELECT json_agg(r) FROM (
+                       SELECT reading_id, temperature_celsius, timestamp
+                       FROM recent
+                       ORDER BY timestamp DESC
+                       LIMIT 10
+                   ) AS r)
+            FROM recent
+        """), {"station_id": station_id, "since": twenty_four_hours_ago}).first()
+
+        if not summary_data or summary_data[0] == 0:
+            # Only when the aggregate comes back empty do we pay for the
+            # lookup that distinguishes an unknown station from a quiet one.
+            exists = db.session.execute(
+                select(Station.station_id).where(Station.station_id == station_id)
+            ).first()
+            if exists is None:
+                return _json({"error": "Station not found"}, 404)
+            return _json({"message": "No readings for this station in the last 24 hours."})
+
+    summary = {
+        "station_id": station_id,
+        "reading_count": summary_data[0],
+        "average_temp_last_24h": round(summary_data[1], 2),
+        "max_temp_last_24h": summary_data[2],
+        "min_temp_last_24h": summary_data[3],
+        "latest_readings": summary_data[4]
+    }
+    _summary_cache[station_id] = summary
+    return _json(summary)
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
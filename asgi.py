@@ -0,0 +1,12 @@
+# ASGI entry point for the full backend. The Flask dev server (app.run) and
+# sync WSGI workers handle one request per worker at a time; uvicorn's
+# uvloop/httptools stack multiplexes many in-flight connections per worker.
+# Run with:
+#
+#   uvicorn asgi:asgi_app --workers $(nproc)
+#
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+asgi_app = WsgiToAsgi(app)
@@ -3,6 +3,10 @@ CREATE TABLE stations (
     name VARCHAR(255) NOT NULL,
     location_text VARCHAR(255),
     api_key_hash VARCHAR(255) NOT NULL,
+    -- NULL on rows created before the move to salted SHA-256 (bcrypt hashes)
+    api_key_salt BYTEA,
+    -- NULL until the station submits its first reading
+    last_reading_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
@@ -11,4 +15,9 @@ CREATE TABLE readings (
     station_id UUID NOT NULL REFERENCES stations(station_id),
     temperature_celsius DECIMAL(5, 2) NOT NULL,
     timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
\ No newline at end of file
+);
+
+-- Serves both the per-station readings listing (ORDER BY timestamp DESC)
+-- and the 24h summary range scan; INCLUDE makes the aggregate index-only.
+CREATE INDEX ix_readings_station_ts ON readings (station_id, timestamp DESC)
+    INCLUDE (temperature_celsius);
\ No newline at end of file